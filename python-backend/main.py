@@ -2,9 +2,25 @@ import json
 import os
 import yaml
 import logging
-from typing import List, Dict, Any, Union, Tuple
-from fastapi import FastAPI, HTTPException, Request
+import logging.handlers
+import atexit
+import queue
+import asyncio
+import io
+import functools
+import hashlib
+import re
+import secrets
+import orjson
+import ijson
+from types import MappingProxyType
+from cachetools import TTLCache
+from typing import List, Dict, Any, AsyncIterator, Callable, Coroutine, Mapping, Optional, Union, Tuple
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Suppress Google AI warnings
@@ -17,15 +33,54 @@ os.environ['GLOG_minloglevel'] = '3'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['ABSL_LOG_LEVEL'] = '3'
 
-import google.generativeai as genai
+from google import genai
+from google.genai import types as genai_types
+
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLLoader
 
 # Configure logging
-logging.getLogger("google.generativeai").setLevel(logging.ERROR)
 logging.getLogger("google").setLevel(logging.ERROR)
 logging.getLogger("grpc").setLevel(logging.ERROR)
 
+# Application logs go through a queue so request handlers never block on stream I/O;
+# a background listener thread does the actual writing
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+log.setLevel(logging.INFO)
+log.propagate = False
+
+class ORJSONRequest(Request):
+    """Request whose JSON body is decoded with orjson instead of the stdlib"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class ORJSONRoute(APIRoute):
+    """Route that hands its endpoint an ORJSONRequest, so request bodies parse with orjson"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request) -> Response:
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
 # Initialize FastAPI app
 app = FastAPI(title="Config Compare AI Backend", version="1.0.0")
+# Must be set before any routes are declared
+app.router.route_class = ORJSONRoute
 
 # Add CORS middleware
 app.add_middleware(
@@ -36,8 +91,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""))
+# Compress responses; repetitive config text and AI result arrays shrink well.
+# The NDJSON stream from /compare/stream opts out so its lines aren't buffered.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Gemini API; one shared client so every request reuses its connection pool
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+_genai_client = None
+
+# Gemini Batch Mode settings for /compare/batch
+BATCH_POLL_INTERVAL = float(os.getenv("GEMINI_BATCH_POLL_INTERVAL", "10"))
+BATCH_TIMEOUT = float(os.getenv("GEMINI_BATCH_TIMEOUT", "3600"))
+# Uploading the request file and downloading results can outlast the per-call timeout
+BATCH_TRANSFER_TIMEOUT = float(os.getenv("GEMINI_BATCH_TRANSFER_TIMEOUT", "300"))
+_BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+# Successful AI analyses keyed by a hash of their inputs, so repeat comparisons skip Gemini
+_ai_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_file_ai_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
 
 # Pydantic models
 class ComparisonRequest(BaseModel):
@@ -60,6 +132,15 @@ class ComparisonResponse(BaseModel):
     error: str = ""
     healthScore: Dict[str, Any] = {}
 
+# Models for batch comparison
+class BatchComparisonRequest(BaseModel):
+    comparisons: List[ComparisonRequest]
+
+class BatchComparisonResponse(BaseModel):
+    success: bool
+    results: List[ComparisonResponse] = []
+    error: str = ""
+
 # New models for individual file analysis
 class FileAnalysisRequest(BaseModel):
     config: str
@@ -79,33 +160,130 @@ class FileAnalysisResponse(BaseModel):
     error: str = ""
     healthScore: Dict[str, Any] = {}
 
-def parse_config(config_str: str) -> Dict[str, Any]:
-    """Parse configuration string (JSON or YAML)"""
+# Keyword patterns for risk classification, matched against lowercased keys/values
+_RE_SECRET = re.compile(r"password|secret|key|token")
+_RE_DEBUG = re.compile(r"debug")
+_RE_HOST = re.compile(r"host|url|endpoint|server")
+_RE_SSL = re.compile(r"ssl|tls|secure|https")
+_RE_SSL_TLS = re.compile(r"ssl|tls")
+_RE_PORT = re.compile(r"port")
+_RE_LOW_RISK = re.compile(r"debug|log|test")
+_RE_WEAK_VALUE = re.compile(r"test|default|demo|password|123")
+_RE_DEV_HOST_VALUE = re.compile(r"localhost|127\.0\.0\.1|dev|test|staging")
+_RE_DEV_VALUE = re.compile(r"test|dev|local|debug|mock|fake")
+_RE_PROD_VALUE = re.compile(r"prod|production|live")
+_RE_INSECURE_PROTOCOL = re.compile(r"http://|ftp://|telnet://")
+
+# Standard ports (80, 443, 3000, 8000, 5000, 8080) vs non-standard
+_STANDARD_PORTS = frozenset({80, 443, 3000, 8000, 5000, 8080})
+
+# orjson turns integers outside the 64-bit range into floats; inputs with digit runs
+# this long go through the stdlib parser, which keeps them exact
+_RE_LONG_DIGITS = re.compile(r"\d{19,}")
+
+@functools.lru_cache(maxsize=512)
+def _parse_cached(config_str: str) -> Any:
+    """Parse configuration string once per distinct payload"""
     try:
         # Try JSON first
-        return json.loads(config_str)
+        if _RE_LONG_DIGITS.search(config_str):
+            return json.loads(config_str)
+        return orjson.loads(config_str)
     except json.JSONDecodeError:
         try:
             # Try YAML if JSON fails
-            return yaml.safe_load(config_str)
+            return yaml.load(config_str, Loader=_YAMLLoader)
         except yaml.YAMLError:
             raise ValueError("Invalid configuration format. Must be JSON or YAML.")
 
-def flatten_dict(d: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
+def parse_config(config_str: str) -> Mapping[str, Any]:
+    """Parse configuration string (JSON or YAML)
+
+    Results are cached and shared between requests and worker threads. Only
+    the top level is wrapped in a read-only view; nested dicts and lists are
+    the cached objects themselves and stay mutable. Callers must treat the
+    whole tree as read-only.
+    """
+    parsed = _parse_cached(config_str)
+    if isinstance(parsed, dict):
+        return MappingProxyType(parsed)
+    return parsed
+
+def flatten_dict(d: Mapping[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
     """Flatten nested dictionary with dot notation"""
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
+    out = {}
+    # Each frame holds the key path so far and the remaining items at that level,
+    # so leaves come out in document order without recursing per nesting level
+    stack = [((parent_key,) if parent_key else (), iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            if isinstance(v, dict):
+                stack.append((prefix + (k,), iter(v.items())))
+                break
+            out[sep.join(map(str, prefix + (k,)))] = v
         else:
-            items.append((new_key, v))
-    return dict(items)
+            stack.pop()
+    return out
 
-def determine_problematic_environment(key: str, dev_val: Any, prod_val: Any) -> Tuple[str, str]:
-    """
-    Determine which environment has the problematic value and return (problematic_value, environment)
-    """
+def _secret_environment(dev_val: Any, prod_val: Any, dev_str: str, prod_str: str) -> Optional[Tuple[str, str]]:
+    """Security-related issues: if dev has insecure values, dev is problematic"""
+    # If dev has weak/default values, it's problematic
+    if _RE_WEAK_VALUE.search(dev_str):
+        return str(dev_val), 'dev'
+    return str(prod_val), 'prod'
+
+def _debug_environment(dev_val: Any, prod_val: Any, dev_str: str, prod_str: str) -> Optional[Tuple[str, str]]:
+    """Debug/Development settings: if enabled in prod, prod is problematic"""
+    if prod_str in {'true', '1', 'yes', 'on', 'enabled'}:
+        return str(prod_val), 'prod'  # Debug enabled in prod is bad
+    return str(dev_val), 'dev'
+
+def _host_environment(dev_val: Any, prod_val: Any, dev_str: str, prod_str: str) -> Optional[Tuple[str, str]]:
+    """Host/URL patterns: dev environments typically problematic"""
+    if _RE_DEV_HOST_VALUE.search(dev_str):
+        return str(dev_val), 'dev'
+    return str(prod_val), 'prod'
+
+def _ssl_environment(dev_val: Any, prod_val: Any, dev_str: str, prod_str: str) -> Optional[Tuple[str, str]]:
+    """SSL/Security: if prod is insecure, prod is problematic"""
+    if prod_str in {'false', '0', 'no', 'off', 'disabled'}:
+        return str(prod_val), 'prod'
+    return str(dev_val), 'dev'
+
+def _port_environment(dev_val: Any, prod_val: Any, dev_str: str, prod_str: str) -> Optional[Tuple[str, str]]:
+    """Port patterns: non-standard ports might be problematic"""
+    try:
+        dev_port = int(dev_str) if dev_str.isdigit() else None
+        prod_port = int(prod_str) if prod_str.isdigit() else None
+    except ValueError:
+        return None
+    
+    if dev_port and dev_port not in _STANDARD_PORTS and prod_port in _STANDARD_PORTS:
+        return str(dev_val), 'dev'
+    if prod_port and prod_port not in _STANDARD_PORTS and dev_port in _STANDARD_PORTS:
+        return str(prod_val), 'prod'
+    return None
+
+# Key categories in priority order; the first pattern matching the key decides the handler.
+# A handler returning None falls through to the generic dev/prod value heuristics.
+_CATEGORY_HANDLERS = [
+    (_RE_SECRET, _secret_environment),
+    (_RE_DEBUG, _debug_environment),
+    (_RE_HOST, _host_environment),
+    (_RE_SSL, _ssl_environment),
+    (_RE_PORT, _port_environment),
+]
+
+def _hashable_value(value: Any) -> Any:
+    """Make a config value usable as a cache key, keeping None and scalars as-is"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _determine_problematic_environment(key: str, dev_val: Any, prod_val: Any) -> Tuple[str, str]:
+    """Cached implementation of determine_problematic_environment"""
     if dev_val is None and prod_val is not None:
         return str(prod_val), 'prod'  # Missing in dev
     if prod_val is None and dev_val is not None:
@@ -115,202 +293,391 @@ def determine_problematic_environment(key: str, dev_val: Any, prod_val: Any) ->
     prod_str = str(prod_val).lower() if prod_val is not None else ""
     key_lower = key.lower()
     
-    # Security-related issues: if dev has insecure values, dev is problematic
-    if any(pattern in key_lower for pattern in ['password', 'secret', 'key', 'token']):
-        # If dev has weak/default values, it's problematic
-        if any(weak in dev_str for weak in ['test', 'default', 'demo', 'password', '123']):
-            return str(dev_val), 'dev'
-        return str(prod_val), 'prod'
-    
-    # Debug/Development settings: if enabled in prod, prod is problematic
-    if 'debug' in key_lower:
-        if prod_str in ['true', '1', 'yes', 'on', 'enabled']:
-            return str(prod_val), 'prod'  # Debug enabled in prod is bad
-        return str(dev_val), 'dev'
-    
-    # Host/URL patterns: dev environments typically problematic
-    if any(pattern in key_lower for pattern in ['host', 'url', 'endpoint', 'server']):
-        if any(dev_pattern in dev_str for dev_pattern in ['localhost', '127.0.0.1', 'dev', 'test', 'staging']):
-            return str(dev_val), 'dev'
-        return str(prod_val), 'prod'
-    
-    # SSL/Security: if prod is insecure, prod is problematic  
-    if any(pattern in key_lower for pattern in ['ssl', 'tls', 'secure', 'https']):
-        if prod_str in ['false', '0', 'no', 'off', 'disabled']:
-            return str(prod_val), 'prod'
-        return str(dev_val), 'dev'
-    
-    # Port patterns: non-standard ports might be problematic
-    if 'port' in key_lower:
-        try:
-            dev_port = int(dev_str) if dev_str.isdigit() else None
-            prod_port = int(prod_str) if prod_str.isdigit() else None
-            
-            # Standard ports (80, 443, 3000, 8000, 5000) vs non-standard
-            standard_ports = [80, 443, 3000, 8000, 5000, 8080]
-            
-            if dev_port and dev_port not in standard_ports and prod_port in standard_ports:
-                return str(dev_val), 'dev'
-            if prod_port and prod_port not in standard_ports and dev_port in standard_ports:
-                return str(prod_val), 'prod'
-        except:
-            pass
+    for pattern, handler in _CATEGORY_HANDLERS:
+        if pattern.search(key_lower):
+            result = handler(dev_val, prod_val, dev_str, prod_str)
+            if result is not None:
+                return result
+            break
     
     # Default: if values are different, assume dev is more likely to have development-specific issues
     if dev_val != prod_val:
         # Check for development-specific patterns
-        if any(dev_pattern in dev_str for dev_pattern in ['test', 'dev', 'local', 'debug', 'mock', 'fake']):
+        if _RE_DEV_VALUE.search(dev_str):
             return str(dev_val), 'dev'
-        if any(prod_pattern in prod_str for prod_pattern in ['prod', 'production', 'live']):
+        if _RE_PROD_VALUE.search(prod_str):
             return str(dev_val), 'dev'  # Dev value is the issue
     
     # Fallback: return dev value as potentially problematic
     return str(dev_val), 'dev'
 
-def calculate_health_score(results: List[ComparisonResult]) -> Dict[str, Any]:
-    """Calculate configuration health metrics"""
-    if not results:
-        return {
-            "score": 100,
-            "highRisk": 0,
-            "mediumRisk": 0,
-            "lowRisk": 0
-        }
-    
-    high_risk = sum(1 for r in results if r.risk == "High")
-    medium_risk = sum(1 for r in results if r.risk == "Medium")
-    low_risk = sum(1 for r in results if r.risk == "Low")
-    
-    # Calculate score: start at 100, deduct points based on risk
-    score = 100
-    score -= (high_risk * 25)    # High risk: -25 points each
-    score -= (medium_risk * 10)  # Medium risk: -10 points each
-    score -= (low_risk * 5)      # Low risk: -5 points each
-    score = max(0, score)        # Don't go below 0
+def determine_problematic_environment(key: str, dev_val: Any, prod_val: Any) -> Tuple[str, str]:
+    """
+    Determine which environment has the problematic value and return (problematic_value, environment)
+    """
+    return _determine_problematic_environment(key, _hashable_value(dev_val), _hashable_value(prod_val))
+
+# Points deducted from a perfect score of 100 per issue at each risk level
+_COMPARISON_RISK_PENALTIES = {"High": 25, "Medium": 10, "Low": 5}
+_FILE_RISK_PENALTIES = {"High": 30, "Medium": 15, "Low": 5}  # More severe for individual files
+
+def _score_risks(items: List[Union[ComparisonResult, FileIssue]], penalties: Dict[str, int]) -> Dict[str, Any]:
+    """Count risk levels and total their penalties in a single pass"""
+    counts = dict.fromkeys(penalties, 0)
+    penalty = 0
+    for item in items:
+        risk = item.risk
+        if risk in counts:
+            counts[risk] += 1
+            penalty += penalties[risk]
     
     return {
-        "score": score,
-        "highRisk": high_risk,
-        "mediumRisk": medium_risk,
-        "lowRisk": low_risk
+        "score": max(0, 100 - penalty),  # Don't go below 0
+        "highRisk": counts["High"],
+        "mediumRisk": counts["Medium"],
+        "lowRisk": counts["Low"]
     }
 
-async def analyze_with_ai(dev_config: str, prod_config: str) -> List[ComparisonResult]:
-    """Use Gemini AI to analyze configuration differences"""
-    prompt = f"""You are an expert DevOps and Site Reliability Engineer with deep knowledge of secure and scalable system architecture.
+def calculate_health_score(results: List[ComparisonResult]) -> Dict[str, Any]:
+    """Calculate configuration health metrics"""
+    return _score_risks(results, _COMPARISON_RISK_PENALTIES)
+
+# Comparison prompt pieces, assembled with a single join per request
+_COMPARISON_PROMPT_HEAD = """You are an expert DevOps and Site Reliability Engineer with deep knowledge of secure and scalable system architecture.
 
 You will be given two configuration files, one for a 'dev' environment and one for a 'prod' environment. Analyze them to find meaningful differences.
 
 Identify discrepancies, including missing keys, different values, and semantically different endpoints (e.g., sandbox vs. live URLs). For each discrepancy, provide a concise observation of its impact, a suggested fix, and a risk level ('Low', 'Medium', or 'High').
 
 Your final output must be a single, minified JSON array of objects, with no additional text or explanations. Each object in the array must strictly follow this schema:
-{{
+{
   "key": string,
   "devValue": string, 
   "prodValue": string,
   "observation": string,
   "suggestion": string,
   "risk": "Low" | "Medium" | "High"
-}}
+}
 
 Development Configuration:
-{dev_config}
+"""
+_COMPARISON_PROMPT_MID = """
 
 Production Configuration:
-{prod_config}
+"""
+_COMPARISON_PROMPT_TAIL = """
 
 Analyze these configurations and return only the JSON array:"""
 
+def build_comparison_prompt(dev_config: str, prod_config: str) -> str:
+    """Build the Gemini prompt for comparing dev and prod configurations"""
+    return "".join((
+        _COMPARISON_PROMPT_HEAD, dev_config,
+        _COMPARISON_PROMPT_MID, prod_config,
+        _COMPARISON_PROMPT_TAIL,
+    ))
+
+def parse_comparison_results(ai_text: str) -> List[ComparisonResult]:
+    """Parse the raw Gemini comparison output into ComparisonResult models"""
+    ai_text = ai_text.strip()
+    
+    # Clean up the response (remove any markdown formatting)
+    if ai_text.startswith("```json"):
+        ai_text = ai_text[7:]
+    if ai_text.endswith("```"):
+        ai_text = ai_text[:-3]
+    ai_text = ai_text.strip()
+    
+    # Parse JSON response
+    results_data = orjson.loads(ai_text)
+    
+    # Convert to Pydantic models and add problematic environment detection
+    return [to_comparison_result(item) for item in results_data]
+
+def to_comparison_result(item: Dict[str, Any]) -> ComparisonResult:
+    """Build a ComparisonResult from one AI item, filling in the problematic environment"""
+    # Determine problematic value and environment if not provided by AI
+    if 'problematicValue' not in item or 'problematicEnvironment' not in item:
+        problematic_value, problematic_env = determine_problematic_environment(
+            item['key'], 
+            item['devValue'], 
+            item['prodValue']
+        )
+        item['problematicValue'] = problematic_value
+        item['problematicEnvironment'] = problematic_env
+    
+    # AI output is untrusted, so validate it; a bad item raises and triggers the fallback
+    return ComparisonResult.model_validate(item)
+
+def get_genai_client() -> genai.Client:
+    """Return the shared Gemini client, creating it on first use"""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY", ""),
+            http_options=genai_types.HttpOptions(timeout=int(GEMINI_TIMEOUT * 1000)),  # milliseconds
+        )
+    return _genai_client
+
+class _FenceStripper:
+    """Strip markdown code fences from streamed model output"""
+
+    def __init__(self):
+        self.started = False
+        self._head = ""
+        self._tail = ""
+
+    def feed(self, text: str) -> str:
+        """Return the part of text that is safe to hand to the JSON parser"""
+        if not self.started:
+            # Drop everything before the opening bracket of the JSON array
+            self._head += text
+            start = self._head.find("[")
+            if start < 0:
+                return ""
+            self.started = True
+            text, self._head = self._head[start:], ""
+        
+        # Hold back trailing whitespace/backticks until we know they aren't a closing fence
+        text = self._tail + text
+        body = text.rstrip("` \t\r\n")
+        self._tail = text[len(body):]
+        return body
+
+async def stream_comparison_with_ai(dev_config: str, prod_config: str) -> AsyncIterator[ComparisonResult]:
+    """Stream Gemini comparison results as the model produces them"""
+    cache_key = _ai_cache_key(dev_config, prod_config)
+    cached = _ai_cache.get(cache_key)
+    if cached is not None:
+        for result in cached:
+            yield result
+        return
+    
+    prompt = build_comparison_prompt(dev_config, prod_config)
+    results = []
+    fence = _FenceStripper()
+    items = ijson.sendable_list()
+    parser = ijson.items_coro(items, "item", use_float=True)
+
     try:
-        # Initialize the model
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        response = await get_genai_client().aio.models.generate_content_stream(
+            model=GEMINI_MODEL_NAME,
+            contents=prompt,
+        )
         
+        # Feed chunks to the incremental parser and emit each array item once complete
+        async for chunk in response:
+            text = fence.feed(chunk.text or "")
+            if not text:
+                continue
+            parser.send(text.encode())
+            for item in items:
+                result = to_comparison_result(item)
+                results.append(result)
+                yield result
+            del items[:]
+        
+        if not fence.started:
+            raise ValueError("No JSON array in AI response")
+        parser.close()
+        _ai_cache[cache_key] = tuple(results)
+        
+    except Exception:
+        log.exception("AI streaming analysis failed")
+        # Results already sent can't be taken back, so only fall back before the first one
+        if results:
+            raise
+        for result in await perform_basic_comparison(dev_config, prod_config):
+            yield result
+
+def _ai_cache_key(*parts: str) -> bytes:
+    """Hash the analysis inputs into a compact AI cache key"""
+    return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).digest()
+
+async def analyze_with_ai(dev_config: str, prod_config: str) -> List[ComparisonResult]:
+    """Use Gemini AI to analyze configuration differences"""
+    cache_key = _ai_cache_key(dev_config, prod_config)
+    cached = _ai_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    
+    prompt = build_comparison_prompt(dev_config, prod_config)
+
+    try:
         # Generate response
-        response = model.generate_content(prompt)
+        response = await get_genai_client().aio.models.generate_content(
+            model=GEMINI_MODEL_NAME,
+            contents=prompt,
+        )
         
         # Parse the AI response
-        ai_text = response.text.strip()
+        results = parse_comparison_results(response.text)
+        _ai_cache[cache_key] = tuple(results)
+        return results
         
-        # Clean up the response (remove any markdown formatting)
-        if ai_text.startswith("```json"):
-            ai_text = ai_text[7:]
-        if ai_text.endswith("```"):
-            ai_text = ai_text[:-3]
-        ai_text = ai_text.strip()
+    except Exception:
+        log.exception("AI analysis failed")
+        # Fallback to basic comparison if AI fails
+        return await perform_basic_comparison(dev_config, prod_config)
+
+def _batch_transfer_http_options() -> genai_types.HttpOptions:
+    """HTTP options for batch file transfers, which get a longer timeout than single calls"""
+    return genai_types.HttpOptions(timeout=int(BATCH_TRANSFER_TIMEOUT * 1000))  # milliseconds
+
+async def analyze_batch_with_ai(comparisons: List[ComparisonRequest]) -> List[List[ComparisonResult]]:
+    """Submit all comparisons as a single Gemini Batch Mode job and collect the results"""
+    uploaded = None
+    job = None
+    try:
+        client = get_genai_client()
         
-        # Parse JSON response
-        results_data = json.loads(ai_text)
+        # One JSONL line per comparison, keyed by its position in the request
+        lines = [
+            orjson.dumps({
+                "key": f"req_{i}",
+                "request": {
+                    "contents": [{"parts": [{"text": build_comparison_prompt(c.devConfig, c.prodConfig)}]}]
+                },
+            })
+            for i, c in enumerate(comparisons)
+        ]
+        uploaded = await client.aio.files.upload(
+            file=io.BytesIO(b"\n".join(lines)),
+            config=genai_types.UploadFileConfig(
+                display_name="config-compare-batch",
+                mime_type="jsonl",
+                http_options=_batch_transfer_http_options(),
+            ),
+        )
+        job = await client.aio.batches.create(
+            model=GEMINI_MODEL_NAME,
+            src=uploaded.name,
+            config={"display_name": "config-compare-batch"},
+        )
         
-        # Convert to Pydantic models and add problematic environment detection
-        results = []
-        for item in results_data:
-            # Determine problematic value and environment if not provided by AI
-            if 'problematicValue' not in item or 'problematicEnvironment' not in item:
-                problematic_value, problematic_env = determine_problematic_environment(
-                    item['key'], 
-                    item['devValue'], 
-                    item['prodValue']
-                )
-                item['problematicValue'] = problematic_value
-                item['problematicEnvironment'] = problematic_env
-            
-            results.append(ComparisonResult(**item))
+        # Poll until the job reaches a terminal state
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BATCH_TIMEOUT
+        while job.state.name not in _BATCH_DONE_STATES:
+            if loop.time() > deadline:
+                raise TimeoutError(f"Batch job {job.name} did not finish within {BATCH_TIMEOUT:.0f}s")
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            job = await client.aio.batches.get(name=job.name)
         
-        return results
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job {job.name} ended in state {job.state.name}")
         
-    except Exception as e:
-        print(f"AI Analysis Error: {str(e)}")
-        # Fallback to basic comparison if AI fails
-        return perform_basic_comparison(dev_config, prod_config)
+        # Collect the response text of every successful line
+        content = await client.aio.files.download(
+            file=job.dest.file_name,
+            config=genai_types.DownloadFileConfig(http_options=_batch_transfer_http_options()),
+        )
+        texts = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            try:
+                texts[entry["key"]] = entry["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, TypeError):
+                pass
+        
+    except Exception:
+        log.exception("AI batch analysis failed")
+        # Fallback to basic comparison for every pair if the batch job fails
+        return [await perform_basic_comparison(c.devConfig, c.prodConfig) for c in comparisons]
+    
+    finally:
+        # Don't leave an abandoned job running (and billed) or the request file stored
+        if job is not None and job.state.name not in _BATCH_DONE_STATES:
+            try:
+                await client.aio.batches.cancel(name=job.name)
+            except Exception:
+                log.exception("Cancelling batch job %s failed", job.name)
+        if uploaded is not None:
+            try:
+                await client.aio.files.delete(name=uploaded.name)
+            except Exception:
+                log.exception("Deleting batch input file %s failed", uploaded.name)
+    
+    batch_results = []
+    for i, c in enumerate(comparisons):
+        try:
+            batch_results.append(parse_comparison_results(texts[f"req_{i}"]))
+        except Exception:
+            log.exception("AI batch item req_%d failed", i)
+            batch_results.append(await perform_basic_comparison(c.devConfig, c.prodConfig))
+    
+    return batch_results
 
-def perform_basic_comparison(dev_config: str, prod_config: str) -> List[ComparisonResult]:
+def parse_and_flatten(config_str: str) -> Dict[str, Any]:
+    """Parse a configuration string and flatten it with dot notation"""
+    return flatten_dict(parse_config(config_str))
+
+def build_mismatch_result(key: str, dev_val: Any, prod_val: Any) -> ComparisonResult:
+    """Build the basic-comparison result for a key whose values differ"""
+    # Determine risk level based on key patterns
+    key_lower = key.lower()
+    risk = "Medium"
+    if _RE_SECRET.search(key_lower):
+        risk = "High"
+    elif _RE_LOW_RISK.search(key_lower):
+        risk = "Low"
+    
+    # Determine which environment has the problematic value
+    problematic_value, problematic_env = determine_problematic_environment(key, dev_val, prod_val)
+    
+    return ComparisonResult(
+        key=key,
+        devValue=str(dev_val),
+        prodValue=str(prod_val),
+        problematicValue=problematic_value,
+        problematicEnvironment=problematic_env,
+        observation=f"Configuration mismatch in {key}",
+        suggestion=f"Review and align {key} values between environments",
+        risk=risk
+    )
+
+async def perform_basic_comparison(dev_config: str, prod_config: str) -> List[ComparisonResult]:
     """Basic comparison fallback when AI is unavailable"""
     try:
-        dev_dict = parse_config(dev_config)
-        prod_dict = parse_config(prod_config)
+        # Parse both configs off the event loop so large payloads don't block other requests
+        dev_flat, prod_flat = await asyncio.gather(
+            asyncio.to_thread(parse_and_flatten, dev_config),
+            asyncio.to_thread(parse_and_flatten, prod_config),
+        )
         
-        dev_flat = flatten_dict(dev_dict)
-        prod_flat = flatten_dict(prod_dict)
+        # Configs that differ only in formatting flatten to the same values
+        if dev_flat == prod_flat:
+            return []
         
         results = []
-        all_keys = set(dev_flat.keys()) | set(prod_flat.keys())
+        dev_keys = dev_flat.keys()
+        prod_keys = prod_flat.keys()
         
-        for key in all_keys:
-            dev_val = dev_flat.get(key, "MISSING")
-            prod_val = prod_flat.get(key, "MISSING")
-            
+        # Keys present in both environments
+        for key in dev_keys & prod_keys:
+            dev_val = dev_flat[key]
+            prod_val = prod_flat[key]
             if dev_val != prod_val:
-                # Determine risk level based on key patterns
-                risk = "Medium"
-                if any(keyword in key.lower() for keyword in ["password", "secret", "key", "token"]):
-                    risk = "High"
-                elif any(keyword in key.lower() for keyword in ["debug", "log", "test"]):
-                    risk = "Low"
-                
-                # Determine which environment has the problematic value
-                problematic_value, problematic_env = determine_problematic_environment(key, dev_val, prod_val)
-                
-                results.append(ComparisonResult(
-                    key=key,
-                    devValue=str(dev_val),
-                    prodValue=str(prod_val),
-                    problematicValue=problematic_value,
-                    problematicEnvironment=problematic_env,
-                    observation=f"Configuration mismatch in {key}",
-                    suggestion=f"Review and align {key} values between environments",
-                    risk=risk
-                ))
+                results.append(build_mismatch_result(key, dev_val, prod_val))
+        
+        # Keys missing from one environment
+        for key in dev_keys - prod_keys:
+            results.append(build_mismatch_result(key, dev_flat[key], "MISSING"))
+        for key in prod_keys - dev_keys:
+            results.append(build_mismatch_result(key, "MISSING", prod_flat[key]))
         
         return results
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Configuration parsing error: {str(e)}")
 
-async def analyze_individual_file(config: str, environment: str) -> List[FileIssue]:
-    """Analyze a single configuration file for security and best practices issues"""
-    prompt = f"""You are an expert DevOps and Site Reliability Engineer with deep knowledge of secure system configuration.
+# Individual file prompt pieces, assembled with a single join per request
+_FILE_PROMPT_HEAD = """You are an expert DevOps and Site Reliability Engineer with deep knowledge of secure system configuration.
 
-You will be given a single configuration file from a {environment.upper()} environment. Analyze it thoroughly for:
+You will be given a single configuration file from a """
+_FILE_PROMPT_MID = """ environment. Analyze it thoroughly for:
 
 1. Security vulnerabilities (exposed secrets, weak settings, insecure protocols)
 2. Best practice violations (debug settings in prod, missing essential configs)
@@ -320,25 +687,43 @@ You will be given a single configuration file from a {environment.upper()} envir
 For each problematic configuration item found, provide a concise observation and actionable suggestion.
 
 Your output must be a single, minified JSON array with no additional text. Each object must follow this schema:
-{{
+{
   "key": string,
   "value": string,
   "observation": string,
   "suggestion": string,
   "risk": "Low" | "Medium" | "High"
-}}
+}
 
 Configuration to analyze:
-{config}
+"""
+_FILE_PROMPT_TAIL = """
 
 Return only the JSON array:"""
 
+def build_file_analysis_prompt(config: str, environment: str) -> str:
+    """Build the Gemini prompt for analyzing a single configuration file"""
+    return "".join((
+        _FILE_PROMPT_HEAD, environment.upper(),
+        _FILE_PROMPT_MID, config,
+        _FILE_PROMPT_TAIL,
+    ))
+
+async def analyze_individual_file(config: str, environment: str) -> List[FileIssue]:
+    """Analyze a single configuration file for security and best practices issues"""
+    cache_key = _ai_cache_key(environment.lower(), config)
+    cached = _file_ai_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    
+    prompt = build_file_analysis_prompt(config, environment)
+
     try:
-        # Initialize the model
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
         # Generate response
-        response = model.generate_content(prompt)
+        response = await get_genai_client().aio.models.generate_content(
+            model=GEMINI_MODEL_NAME,
+            contents=prompt,
+        )
         
         # Parse the AI response
         ai_text = response.text.strip()
@@ -351,17 +736,18 @@ Return only the JSON array:"""
         ai_text = ai_text.strip()
         
         # Parse JSON response
-        issues_data = json.loads(ai_text)
+        issues_data = orjson.loads(ai_text)
         
         # Convert to Pydantic models
         issues = []
         for item in issues_data:
-            issues.append(FileIssue(**item))
+            issues.append(FileIssue.model_validate(item))
         
+        _file_ai_cache[cache_key] = tuple(issues)
         return issues
         
-    except Exception as e:
-        print(f"Individual File Analysis Error: {str(e)}")
+    except Exception:
+        log.exception("AI individual file analysis failed")
         # Fallback to basic analysis if AI fails
         return perform_basic_file_analysis(config, environment)
 
@@ -372,14 +758,15 @@ def perform_basic_file_analysis(config: str, environment: str) -> List[FileIssue
         config_flat = flatten_dict(config_dict)
         
         issues = []
+        is_prod = environment.lower() == 'prod'
         
         for key, value in config_flat.items():
             key_lower = key.lower()
             value_str = str(value).lower()
             
             # Check for security issues
-            if any(pattern in key_lower for pattern in ['password', 'secret', 'key', 'token', 'api_key']):
-                if value_str not in ['', 'null', 'none', '***']:
+            if _RE_SECRET.search(key_lower):
+                if value_str not in {'', 'null', 'none', '***'}:
                     issues.append(FileIssue(
                         key=key,
                         value=str(value),
@@ -389,7 +776,7 @@ def perform_basic_file_analysis(config: str, environment: str) -> List[FileIssue
                     ))
             
             # Check for debug settings in production
-            if environment.lower() == 'prod' and 'debug' in key_lower and value_str in ['true', '1', 'on']:
+            if is_prod and _RE_DEBUG.search(key_lower) and value_str in {'true', '1', 'on'}:
                 issues.append(FileIssue(
                     key=key,
                     value=str(value),
@@ -399,8 +786,8 @@ def perform_basic_file_analysis(config: str, environment: str) -> List[FileIssue
                 ))
             
             # Check for SSL/TLS issues
-            if 'ssl' in key_lower or 'tls' in key_lower:
-                if 'verify' in key_lower and value_str in ['false', '0', 'off']:
+            if _RE_SSL_TLS.search(key_lower):
+                if 'verify' in key_lower and value_str in {'false', '0', 'off'}:
                     issues.append(FileIssue(
                         key=key,
                         value=str(value),
@@ -410,7 +797,7 @@ def perform_basic_file_analysis(config: str, environment: str) -> List[FileIssue
                     ))
             
             # Check for insecure protocols
-            if isinstance(value, str) and any(proto in value.lower() for proto in ['http://', 'ftp://', 'telnet://']):
+            if isinstance(value, str) and _RE_INSECURE_PROTOCOL.search(value_str):
                 issues.append(FileIssue(
                     key=key,
                     value=str(value),
@@ -426,31 +813,7 @@ def perform_basic_file_analysis(config: str, environment: str) -> List[FileIssue
 
 def calculate_file_health_score(issues: List[FileIssue]) -> Dict[str, Any]:
     """Calculate individual file health metrics"""
-    if not issues:
-        return {
-            "score": 100,
-            "highRisk": 0,
-            "mediumRisk": 0,
-            "lowRisk": 0
-        }
-    
-    high_risk = sum(1 for issue in issues if issue.risk == "High")
-    medium_risk = sum(1 for issue in issues if issue.risk == "Medium")
-    low_risk = sum(1 for issue in issues if issue.risk == "Low")
-    
-    # Calculate score: start at 100, deduct points based on risk
-    score = 100
-    score -= (high_risk * 30)    # High risk: -30 points each (more severe for individual files)
-    score -= (medium_risk * 15)  # Medium risk: -15 points each
-    score -= (low_risk * 5)      # Low risk: -5 points each
-    score = max(0, score)        # Don't go below 0
-    
-    return {
-        "score": score,
-        "highRisk": high_risk,
-        "mediumRisk": medium_risk,
-        "lowRisk": low_risk
-    }
+    return _score_risks(issues, _FILE_RISK_PENALTIES)
 
 @app.post("/analyze", response_model=FileAnalysisResponse)
 async def analyze_individual_config(request: FileAnalysisRequest):
@@ -505,11 +868,19 @@ async def compare_configs(request: ComparisonRequest):
                 detail="Both development and production configurations are required"
             )
         
+        # Identical configs have no differences, so skip analysis entirely
+        if request.devConfig == request.prodConfig:
+            return ComparisonResponse(
+                success=True,
+                data=[],
+                healthScore=calculate_health_score([])
+            )
+        
         # Analyze configurations with AI
         if os.getenv("GEMINI_API_KEY"):
             results = await analyze_with_ai(request.devConfig, request.prodConfig)
         else:
-            results = perform_basic_comparison(request.devConfig, request.prodConfig)
+            results = await perform_basic_comparison(request.devConfig, request.prodConfig)
         
         # Calculate health score
         health_score = calculate_health_score(results)
@@ -528,6 +899,120 @@ async def compare_configs(request: ComparisonRequest):
             error=f"Analysis failed: {str(e)}"
         )
 
+@app.post("/compare/stream")
+async def compare_configs_stream(request: ComparisonRequest):
+    """Stream comparison results as newline-delimited JSON"""
+    # Validate inputs
+    if not request.devConfig.strip() or not request.prodConfig.strip():
+        raise HTTPException(
+            status_code=400, 
+            detail="Both development and production configurations are required"
+        )
+    
+    async def generate():
+        results = []
+        try:
+            if request.devConfig == request.prodConfig:
+                pass  # Identical configs have no differences to stream
+            elif os.getenv("GEMINI_API_KEY"):
+                async for result in stream_comparison_with_ai(request.devConfig, request.prodConfig):
+                    results.append(result)
+                    yield orjson.dumps({"result": result.model_dump()}) + b"\n"
+            else:
+                results = await perform_basic_comparison(request.devConfig, request.prodConfig)
+                for result in results:
+                    yield orjson.dumps({"result": result.model_dump()}) + b"\n"
+            
+            # Final line carries the health score for everything streamed above
+            yield orjson.dumps({"healthScore": calculate_health_score(results)}) + b"\n"
+        
+        except Exception as e:
+            yield orjson.dumps({"error": f"Analysis failed: {str(e)}"}) + b"\n"
+    
+    # An explicit Content-Encoding makes GZipMiddleware pass the stream through untouched;
+    # gzip would otherwise hold every line back in its buffer until the stream closes
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
+    )
+
+@app.post("/compare/batch", response_model=BatchComparisonResponse)
+async def compare_configs_batch(request: BatchComparisonRequest):
+    """Compare many configuration pairs in one Gemini Batch Mode job"""
+    try:
+        # Validate inputs
+        if not request.comparisons:
+            raise HTTPException(
+                status_code=400,
+                detail="At least one comparison is required"
+            )
+        
+        for comparison in request.comparisons:
+            if not comparison.devConfig.strip() or not comparison.prodConfig.strip():
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Both development and production configurations are required"
+                )
+        
+        # Identical pairs have no differences, so only the rest need analysis
+        pending = [c for c in request.comparisons if c.devConfig != c.prodConfig]
+        
+        # Analyze configurations with AI
+        if not pending:
+            pending_results = []
+        elif os.getenv("GEMINI_API_KEY"):
+            pending_results = await analyze_batch_with_ai(pending)
+        else:
+            pending_results = [
+                await perform_basic_comparison(c.devConfig, c.prodConfig)
+                for c in pending
+            ]
+        
+        # Put the analyzed results back in request order, with empty results for identical pairs
+        pending_iter = iter(pending_results)
+        batch_results = [
+            [] if c.devConfig == c.prodConfig else next(pending_iter)
+            for c in request.comparisons
+        ]
+        
+        return BatchComparisonResponse(
+            success=True,
+            results=[
+                ComparisonResponse(
+                    success=True,
+                    data=results,
+                    healthScore=calculate_health_score(results)
+                )
+                for results in batch_results
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return BatchComparisonResponse(
+            success=False,
+            error=f"Batch analysis failed: {str(e)}"
+        )
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Only allow requests carrying the ADMIN_TOKEN; admin endpoints are disabled when it is unset"""
+    admin_token = os.getenv("ADMIN_TOKEN", "")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/flush", dependencies=[Depends(require_admin_token)])
+async def flush_caches():
+    """Clear the parsed configuration and AI analysis caches"""
+    _parse_cached.cache_clear()
+    _determine_problematic_environment.cache_clear()
+    _ai_cache.clear()
+    _file_ai_cache.clear()
+    return {"status": "flushed"}
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -17,11 +17,28 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     reload = os.getenv("ENV", "development") == "development"
+    # Reload mode only supports a single worker
+    workers = 1 if reload else int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+    
+    # Prefer the uvloop event loop and httptools parser (installed with uvicorn[standard])
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        print("uvloop not installed. Falling back to the default asyncio event loop.")
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        print("httptools not installed. Falling back to the h11 HTTP parser.")
+        http = "h11"
     
     print(f"Starting Config Compare AI Backend...")
     print(f"Server: http://{host}:{port}")
     print(f"AI Enabled: {'Yes' if os.getenv('GEMINI_API_KEY') else 'No (using basic comparison)'}")
     print(f"Auto-reload: {'Yes' if reload else 'No'}")
+    print(f"Workers: {workers} (loop: {loop}, http: {http})")
     
     # Start server
     uvicorn.run(
@@ -29,5 +46,9 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=reload,
+        workers=workers,
+        loop=loop,
+        http=http,
+        access_log=reload,  # Per-request access logging only while developing
         log_level="info"
     )
\ No newline at end of file